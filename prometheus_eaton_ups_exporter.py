@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 """Prometheus exporter for single or multiple Eaton UPSs."""
+import signal
 import sys
-import time
 import traceback
+from threading import Event
 from typing import Tuple
 from argparse import (
     Action,
@@ -106,6 +107,21 @@ def create_parser() -> ArgumentParser:
         choices=[Range(REQUEST_TIMEOUT, 10)],
         default=3
     )
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        help='Seconds to reuse a UPS response for further scrapes, '
+             '0 disables caching',
+        choices=[Range(0, float('inf'))],
+        default=0
+    )
+    parser.add_argument(
+        '--compact-metrics',
+        action='store_true',
+        help='Export input, output and battery measures as one gauge '
+             'per group with a field label',
+        default=False
+    )
     return parser
 
 
@@ -139,10 +155,14 @@ def run(args: Namespace) -> None:
             insecure=args.insecure,
             verbose=args.verbose,
             threading=args.threading,
-            login_timeout=args.login_timeout
+            login_timeout=args.login_timeout,
+            cache_ttl=args.cache_ttl,
+            compact_metrics=args.compact_metrics
         )
     )
     # Start up the server to expose the metrics.
+    # prometheus_client serves every request in its own thread, so
+    # concurrent scrapes are handled in parallel.
     print(f"Starting Prometheus Eaton UPS Exporter on {host_address}:{port}")
     try:
         start_http_server(port=int(port), addr=host_address)
@@ -153,14 +173,16 @@ def run(args: Namespace) -> None:
             print(err)
         sys.exit(1)
 
-    # Run forever until an Error Event or Keyboard Interrupt
+    # Block until SIGTERM, SIGINT or a Keyboard Interrupt
+    stop = Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
     try:
-        while True:
-            time.sleep(1)
-
+        stop.wait()
     except KeyboardInterrupt:
-        print("Prometheus Eaton UPS Exporter shut down")
-        sys.exit(0)
+        pass
+    print("Prometheus Eaton UPS Exporter shut down")
+    sys.exit(0)
 
 
 def main() -> None:
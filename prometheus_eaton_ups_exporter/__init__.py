@@ -2,38 +2,49 @@
 
 import logging
 
+# Prefer the faster orjson parser when it is installed
+try:
+    from orjson import dumps, loads  # noqa: F401
+except ImportError:
+    from json import dumps, loads  # noqa: F401
+
 # External (root level) logging level
 logging.basicConfig(level=logging.ERROR, format='%(levelname)s - %(message)s')
 
+# Formatters shared by the handlers of all loggers
+DEBUG_FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+ERROR_FORMATTER = logging.Formatter(
+    'ERROR %(name)s:%(lineno)s %(message)s'
+)
+
 
 def create_logger(name: str,
                   disabled: bool = False) -> logging.Logger:
-    """Create logger for debug and error levels."""
-    logger = logging.Logger(name)
+    """Create logger for debug and error levels.
+
+    Loggers are registered by name, so creating a logger with the same name
+    again returns the existing one instead of adding duplicate handlers.
+    """
+    logger = logging.getLogger(name)
+    logger.disabled = disabled
+    if logger.handlers:
+        return logger
+
     logger.setLevel(logging.DEBUG)
+    # handled here, do not pass records on to the root logger
+    logger.propagate = False
 
     # create console handler and set level to debug
     debug_sh = logging.StreamHandler()
     debug_sh.setLevel(logging.DEBUG)
-
-    # create debug formatter
-    debug_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    # add formatter to debug_sh
-    debug_sh.setFormatter(debug_formatter)
+    debug_sh.setFormatter(DEBUG_FORMATTER)
     logger.addHandler(debug_sh)
 
     # Create console handler and set level to error
     error_sh = logging.StreamHandler()
     error_sh.setLevel(logging.ERROR)
-
-    # create error formatter
-    error_formatter = logging.Formatter(
-        'ERROR %(name)s:%(lineno)s %(message)s'
-    )
-    # add formatter to error_sh
-    error_sh.setFormatter(error_formatter)
+    error_sh.setFormatter(ERROR_FORMATTER)
     logger.addHandler(error_sh)
-    logger.disabled = disabled
     return logger
@@ -1,17 +1,140 @@
 """Create and run a Prometheus Exporter for an Eaton UPS."""
-import json
+import atexit
+import time
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from concurrent.futures._base import TimeoutError
+from concurrent.futures import ThreadPoolExecutor, wait
+from operator import itemgetter
 from prometheus_client.core import GaugeMetricFamily
+from threading import Lock
 
-from prometheus_eaton_ups_exporter import create_logger
+from prometheus_eaton_ups_exporter import create_logger, loads
 from prometheus_eaton_ups_exporter.scraper import UPSScraper
 
-from typing import Generator, Tuple
+from typing import Any, Callable, Generator, Tuple
 
 NORMAL_EXECUTION = 0
 
+# The UPS reports temperatures in Kelvin
+KELVIN_OFFSET = 273.15
+
+
+def _ratio(percent: int | str) -> float:
+    """Convert a percentage reading into a ratio."""
+    return int(percent) / 100
+
+
+def _celsius(kelvin: float) -> float:
+    """Convert a Kelvin reading into degrees Celsius."""
+    return kelvin - KELVIN_OFFSET
+
+
+def _health_ok(health: str) -> int:
+    """Map a health status to 1 if it is ok, else 0."""
+    return int(health == 'ok')
+
+
+def _health_fault(health: str) -> int:
+    """Map a health status to 0 if it is ok, else 1."""
+    return int(health != 'ok')
+
+
+def _gauge(name: str,
+           documentation: str,
+           labels: Tuple[str, ...],
+           label_values: Tuple[str, ...],
+           value: float) -> GaugeMetricFamily:
+    """Create a gauge with a single sample."""
+    gauge = GaugeMetricFamily(name, documentation, labels=labels)
+    gauge.add_metric(label_values, value)
+    return gauge
+
+
+# Label names shared by all gauges of a kind
+_UPS_ID_LABEL = ('ups_id',)
+_UPS_FIELD_LABELS = ('ups_id', 'field')
+_UPS_SYS_LABELS = ('ups_id', 'name', 'bootloaderVersion', 'firmwareVersion')
+_UPS_TEMP_LABELS = ('ups_id', 'name', 'position')
+
+MetricSpec = Tuple[
+    str, str, Tuple[str, ...], str,
+    Callable[[dict], Any], Callable[[Any], Any] | None
+]
+
+# Gauges exported per UPS as (name, help, labels, section, field, convert).
+# field is an itemgetter applied to the section of the per-UPS context built
+# in collect(), convert (if set) turns the raw reading into the sample value.
+_METRIC_SPECS: Tuple[MetricSpec, ...] = (
+    # Input metrics
+    ("eaton_ups_input_volts", 'UPS input voltage (V)', _UPS_ID_LABEL,
+     'inputs_measures', itemgetter('voltage'), None),
+    ("eaton_ups_input_hertz", 'UPS input frequency (Hz)', _UPS_ID_LABEL,
+     'inputs_measures', itemgetter('frequency'), None),
+    ("eaton_ups_input_volts_max", 'UPS input voltage (V)', _UPS_ID_LABEL,
+     'inputs_voltage_spec', itemgetter('maxReading'), None),
+    ("eaton_ups_input_volts_min", 'UPS input voltage (V)', _UPS_ID_LABEL,
+     'inputs_voltage_spec', itemgetter('minReading'), None),
+    ("eaton_ups_input_volts_nominal", 'UPS input voltage (V)', _UPS_ID_LABEL,
+     'inputs_voltage_spec', itemgetter('nominal'), None),
+    ("eaton_ups_input_health", 'UPS input health status', _UPS_ID_LABEL,
+     'inputs_status', itemgetter('health'), _health_fault),
+    # Output metrics
+    ("eaton_ups_output_volts", 'UPS output voltage (V)', _UPS_ID_LABEL,
+     'outputs_measures', itemgetter('voltage'), None),
+    ("eaton_ups_output_hertz", 'UPS output frequency (Hz)', _UPS_ID_LABEL,
+     'outputs_measures', itemgetter('frequency'), None),
+    ("eaton_ups_output_amperes", 'UPS output current (A)', _UPS_ID_LABEL,
+     'outputs_measures', itemgetter('current'), None),
+    ("eaton_ups_output_voltamperes", 'UPS output apparent power (VA)',
+     _UPS_ID_LABEL,
+     'outputs_measures', itemgetter('apparentPower'), None),
+    ("eaton_ups_output_watts", 'UPS output active power (W)', _UPS_ID_LABEL,
+     'outputs_measures', itemgetter('activePower'), None),
+    ("eaton_ups_output_power_factor", 'UPS output power factor', _UPS_ID_LABEL,
+     'outputs_measures', itemgetter('powerFactor'), None),
+    ("eaton_ups_output_average_energy", 'UPS output average energy',
+     _UPS_ID_LABEL,
+     'outputs_measures', itemgetter('averageEnergy'), None),
+    ("eaton_ups_output_cumulated_energy", 'UPS output cumulated energy',
+     _UPS_ID_LABEL,
+     'outputs_measures', itemgetter('cumulatedEnergy'), None),
+    ("eaton_ups_output_efficiency", 'UPS output efficiency', _UPS_ID_LABEL,
+     'outputs_measures', itemgetter('efficiency'), None),
+    ("eaton_ups_output_load_ratio",
+     "Ratio of the output apparent power vs. the UPS's capacity in VA.",
+     _UPS_ID_LABEL,
+     'outputs_measures', itemgetter('percentLoad'), _ratio),
+    ("eaton_ups_output_health", 'UPS output health status', _UPS_ID_LABEL,
+     'outputs_status', itemgetter('health'), _health_ok),
+    # Battery
+    ("eaton_ups_battery_volts", 'UPS battery voltage (V)', _UPS_ID_LABEL,
+     'powerbank_measures', itemgetter('voltage'), None),
+    ("eaton_ups_battery_state_of_charge", 'UPS battery state of charge (%)',
+     _UPS_ID_LABEL,
+     'powerbank_measures', itemgetter('stateOfCharge'), None),
+    ("eaton_ups_battery_remaining_seconds", 'UPS remaining battery time (s)',
+     _UPS_ID_LABEL,
+     'powerbank_measures', itemgetter('remainingTime'), None),
+    ("eaton_ups_battery_health", 'UPS health status', _UPS_ID_LABEL,
+     'powerbank_status', itemgetter('health'), _health_ok),
+)
+
+# Gauges whose values only change with the firmware of a UPS. They are built
+# once per UPS and reused by further scrapes until its system details change.
+_STATIC_METRICS = frozenset((
+    "eaton_ups_input_volts_max",
+    "eaton_ups_input_volts_min",
+    "eaton_ups_input_volts_nominal",
+    "eaton_ups_system",
+))
+
+# (group, field) of each spec for compact metrics, where all gauges of a
+# group are exported as one eaton_ups_<group> gauge with a field label,
+# ex: eaton_ups_input_volts -> eaton_ups_input{field="volts"}
+_COMPACT_FIELDS: Tuple[Tuple[str, str], ...] = tuple(
+    tuple(spec[0].removeprefix('eaton_ups_').split('_', 1))
+    for spec in _METRIC_SPECS
+)
+
 
 class UPSExporter:
     """Prometheus single exporter.
@@ -26,7 +149,24 @@ class UPSExporter:
         Allow logging output for development.
     :param login_timeout: int
         Login timeout for authentication
+    :param cache_ttl: float
+        Seconds a successful UPS response is reused for further scrapes,
+        0 disables caching
+    :param compact_metrics: bool
+        Whether to export the input, output and battery measures as one
+        gauge per group with a field label
     """
+    __slots__ = (
+        "logger",
+        "compact_metrics",
+        "cache_ttl",
+        "_cache",
+        "_cache_locks",
+        "_cache_lock",
+        "_static_gauges",
+        "ups_scraper",
+    )
+
     def __init__(
             self,
             ups_address: str,
@@ -34,11 +174,14 @@ class UPSExporter:
             name: str | None = None,
             insecure: bool = False,
             verbose: bool = False,
-            login_timeout: int = 3
+            login_timeout: int = 3,
+            cache_ttl: float = 0,
+            compact_metrics: bool = False
     ) -> None:
         self.logger = create_logger(
             f"{__name__}.{self.__class__.__name__}", not verbose
         )
+        self._init_state(cache_ttl, compact_metrics)
         self.ups_scraper = UPSScraper(
             ups_address,
             authentication,
@@ -48,240 +191,172 @@ class UPSExporter:
             login_timeout=login_timeout
         )
 
+    def _init_state(self, cache_ttl: float, compact_metrics: bool) -> None:
+        """Set up the caches and options shared by all exporters."""
+        self.compact_metrics = compact_metrics
+        self.cache_ttl = cache_ttl
+        self._cache: dict[UPSScraper, Tuple[float, dict[str, Any]]] = {}
+        self._cache_locks: dict[UPSScraper, Lock] = {}
+        self._cache_lock = Lock()
+        self._static_gauges: dict[
+            str,
+            Tuple[Tuple[str, str, str] | None, dict[str, GaugeMetricFamily]]
+        ] = {}
+
     def collect(self) -> Generator[GaugeMetricFamily, None, None]:
         """Export UPS metrics on request."""
+        # compact gauges are shared by all UPSs, labeled by ups_id
+        compact_gauges: dict[str, GaugeMetricFamily] = {}
         ups_data = self.scrape_data()
         for data in ups_data:
-            if not data:
+            if not data or not data['measures']:
                 continue
 
-            if data['measures']:
+            # Read the whole response up front, so a malformed response
+            # skips the UPS instead of exporting part of it
+            try:
                 measures = data['measures']
-                ups_id = measures.get('ups_id')
-                inputs = measures.get('ups_inputs')
-                outputs = measures.get('ups_outputs')
-                powerbank_details = measures.get('ups_powerbank')
+                ups_id = measures['ups_id']
+                inputs = measures['ups_inputs']
+                outputs = measures['ups_outputs']
+                powerbank_details = measures['ups_powerbank']
+                # newer firmwares nest the measures in 'realtime'
                 inputs_measures = inputs['measures']
                 outputs_measures = outputs['measures']
-                inputs_status = inputs['status']
-                outputs_status = outputs['status']
-                inputs_spec = inputs['specifications']
-                outputs_spec = outputs['specifications']
-                powerbank_m = powerbank_details['measures']
-                powerbank_s = powerbank_details['status']
-
-                ## Input metrics
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_input_volts",
-                    'UPS input voltage (V)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], inputs_measures['voltage'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_input_hertz",
-                    'UPS input frequency (Hz)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], inputs_measures['frequency'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_input_volts_max",
-                    'UPS input voltage (V)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], inputs_spec['voltage']['maxReading'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_input_volts_min",
-                    'UPS input voltage (V)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], inputs_spec['voltage']['minReading'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_input_volts_nominal",
-                    'UPS input voltage (V)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], inputs_spec['voltage']['nominal'])
-                yield gauge
-
-                if inputs_status['health'] == 'ok':
-                    health_value = 0
-                else:
-                    health_value = 1
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_input_health",
-                    'UPS input health status',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], health_value)
-                yield gauge
-
-                ## Output metrics
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_output_volts",
-                    'UPS output voltage (V)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], outputs_measures['voltage'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_output_hertz",
-                    'UPS output frequency (Hz)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], outputs_measures['frequency'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_output_amperes",
-                    'UPS output current (A)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], outputs_measures['current'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_output_voltamperes",
-                    'UPS output apparent power (VA)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], outputs_measures['apparentPower'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_output_watts",
-                    'UPS output active power (W)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], outputs_measures['activePower'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_output_power_factor",
-                    'UPS output power factor',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], outputs_measures['powerFactor'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_output_average_energy",
-                    'UPS output average energy',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], outputs_measures['averageEnergy'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_output_cumulated_energy",
-                    'UPS output cumulated energy',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], outputs_measures['cumulatedEnergy'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_output_efficiency",
-                    'UPS output efficiency',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], outputs_measures['efficiency'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_output_load_ratio",
-                    "Ratio of the output apparent power vs. "
-                    "the UPS's capacity in VA.",
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], int(outputs_measures['percentLoad']) / 100)
-                yield gauge
-
-                if outputs_status['health'] == 'ok':
-                    health_value = 1
-                else:
-                    health_value = 0
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_output_health",
-                    'UPS output health status',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], health_value)
-                yield gauge
-
-
-                # Battery
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_battery_volts",
-                    'UPS battery voltage (V)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], powerbank_m['voltage'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_battery_state_of_charge",
-                    'UPS battery state of charge (%)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric( [ups_id], powerbank_m['stateOfCharge'])
-                yield gauge
-
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_battery_remaining_seconds",
-                    'UPS remaining battery time (s)',
-                    labels=['ups_id']
-                )
-                gauge.add_metric([ups_id], powerbank_m['remainingTime'])
-                yield gauge
+                ctx = {
+                    "inputs_measures": inputs_measures.get(
+                        'realtime', inputs_measures
+                    ),
+                    "inputs_voltage_spec": inputs['specifications']['voltage'],
+                    "inputs_status": inputs['status'],
+                    "outputs_measures": outputs_measures.get(
+                        'realtime', outputs_measures
+                    ),
+                    "outputs_status": outputs['status'],
+                    "powerbank_measures": powerbank_details['measures'],
+                    "powerbank_status": powerbank_details['status'],
+                }
+                system = data['system']
+                system_details = (
+                    system['name'],
+                    system['bootloaderVersion'],
+                    system['firmwareVersion']
+                ) if system else None
+                # reuse the static gauges while the system is unchanged
+                static_gauges = {}
+                if not self.compact_metrics:
+                    cached = self._static_gauges.get(ups_id)
+                    if cached and cached[0] == system_details:
+                        static_gauges = cached[1]
+
+                values = []
+                for name, _, _, section, field, convert in _METRIC_SPECS:
+                    if name in static_gauges:
+                        values.append(None)
+                        continue
+                    value = field(ctx[section])
+                    values.append(convert(value) if convert else value)
 
-                gauge = GaugeMetricFamily(
-                    "eaton_ups_battery_health",
-                    'UPS health status',
-                    labels=['ups_id']
+                temperature = data['temperature']
+                if temperature:
+                    temperature_labels = (
+                        ups_id,
+                        temperature['name'],
+                        temperature['position']
+                    )
+                    temperature_value = _celsius(temperature['measure'])
+            except KeyError as err:
+                self.logger.warning(
+                    "Missing %s in UPS response, skipping UPS", err
                 )
+                continue
 
-                if powerbank_s['health'] == 'ok':
-                    health_value = 1
-                else:
-                    health_value = 0
-                gauge.add_metric([ups_id], health_value)
-                yield gauge
-
-            if data['system']:
-                system = data['system']
-                gauge = GaugeMetricFamily(
+            ups_id_label = (ups_id,)
+            new_static_gauges = {}
+            for (name, documentation, labels, *_), (group, field_name), \
+                    value in zip(_METRIC_SPECS, _COMPACT_FIELDS, values):
+                if self.compact_metrics:
+                    gauge = compact_gauges.get(group)
+                    if gauge is None:
+                        gauge = compact_gauges[group] = GaugeMetricFamily(
+                            f"eaton_ups_{group}",
+                            f'UPS {group} measurements',
+                            labels=_UPS_FIELD_LABELS
+                        )
+                    gauge.add_metric((ups_id, field_name), value)
+                    continue
+
+                if name in _STATIC_METRICS:
+                    gauge = static_gauges.get(name) or _gauge(
+                        name, documentation, labels, ups_id_label, value
+                    )
+                    new_static_gauges[name] = gauge
+                    yield gauge
+                    continue
+
+                yield _gauge(name, documentation, labels, ups_id_label, value)
+
+            if system_details is not None:
+                gauge = static_gauges.get("eaton_ups_system") or _gauge(
                     "eaton_ups_system",
                     'UPS system details',
-                    labels=['ups_id','name','bootloaderVersion','firmwareVersion']
+                    _UPS_SYS_LABELS,
+                    (ups_id, *system_details),
+                    1
                 )
-                gauge.add_metric([ups_id, system['name'], system['bootloaderVersion'], system['firmwareVersion']], 1)
+                new_static_gauges["eaton_ups_system"] = gauge
                 yield gauge
 
-            if data['temperature']:
-                temperature = data['temperature']
-                gauge = GaugeMetricFamily(
+            if temperature:
+                yield _gauge(
                     "eaton_ups_temperature",
                     'UPS temperature (C)',
-                    labels=['ups_id','name','position']
+                    _UPS_TEMP_LABELS,
+                    temperature_labels,
+                    temperature_value
                 )
-                gauge.add_metric([ups_id, temperature['name'], temperature['position']], temperature['measure'] - 273.15)
-                yield gauge
 
-    def scrape_data(self):
+            if not self.compact_metrics:
+                self._static_gauges[ups_id] = (
+                    system_details, new_static_gauges
+                )
+
+        yield from compact_gauges.values()
+
+    def get_ups_data(self, ups: UPSScraper) -> dict[str, Any]:
+        """Get the data of a UPS, reusing a response younger than cache_ttl.
+
+        :param ups: UPSScraper
+            Scraper of the UPS to get the data from
+        :return: data
+        """
+        if self.cache_ttl <= 0:
+            return ups.get_data()
+
+        # One lock per UPS, held through the refresh, so concurrent
+        # scrapes wait for a single request and reuse its response
+        with self._cache_lock:
+            ups_lock = self._cache_locks.setdefault(ups, Lock())
+
+        with ups_lock:
+            timestamp, data = self._cache.get(ups, (0.0, None))
+            if (data is not None
+                    and time.monotonic() - timestamp < self.cache_ttl):
+                return data
+
+            data = ups.get_data()
+            # Only cache responses with the system, temperature and measures
+            # all loaded, so a failed fetch of any of them is retried
+            if data and all(data.values()):
+                self._cache[ups] = (time.monotonic(), data)
+        return data
+
+    def scrape_data(self) -> Generator[dict[str, Any] | None, None, None]:
         """Scrape measure data.
 
         :return: measures
         """
-        yield self.ups_scraper.get_data()
+        yield self.get_ups_data(self.ups_scraper)
 
 
 class UPSMultiExporter(UPSExporter):
@@ -303,7 +378,21 @@ class UPSMultiExporter(UPSExporter):
         Allow logging output for development
     :param login_timeout: int
         Login timeout for authentication
+    :param cache_ttl: float
+        Seconds a successful UPS response is reused for further scrapes,
+        0 disables caching
+    :param compact_metrics: bool
+        Whether to export the input, output and battery measures as one
+        gauge per group with a field label
     """
+    __slots__ = (
+        "insecure",
+        "threading",
+        "verbose",
+        "login_timeout",
+        "ups_devices",
+        "_pool",
+    )
 
     def __init__(
             self,
@@ -311,23 +400,41 @@ class UPSMultiExporter(UPSExporter):
             insecure: bool = False,
             threading: bool = False,
             verbose: bool = False,
-            login_timeout: int = 3
+            login_timeout: int = 3,
+            cache_ttl: float = 0,
+            compact_metrics: bool = False
     ) -> None:
         self.logger = create_logger(
             f"{__name__}.{self.__class__.__name__}", not verbose
         )
+        self._init_state(cache_ttl, compact_metrics)
         self.insecure = insecure
         self.threading = threading
         self.verbose = verbose
         self.login_timeout = login_timeout
         self.ups_devices = self.get_ups_devices(config)
 
+        self._pool: ThreadPoolExecutor | None = None
+        if self.threading:
+            # One worker per UPS, so the scrape takes as long as the
+            # slowest device instead of queueing behind the default pool size
+            self._pool = ThreadPoolExecutor(
+                max_workers=max(1, len(self.ups_devices)),
+                thread_name_prefix="ups-scrape"
+            )
+            atexit.register(self.close)
+
+    def close(self) -> None:
+        """Shut down the worker threads used for scraping."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
     @staticmethod
-    def get_devices(config: str | dict) -> dict:
+    def get_devices(config: str | dict) -> dict[str, Any]:
         """Take a config file path or config dict of UPSs."""
         if isinstance(config, str):
-            with open(config) as json_file:
-                devices = json.load(json_file)
+            with open(config, 'rb') as json_file:
+                devices = loads(json_file.read())
         elif isinstance(config, dict):
             devices = config
         else:
@@ -335,7 +442,7 @@ class UPSMultiExporter(UPSExporter):
         return devices
 
     def get_ups_devices(self,
-                        config: str | dict) -> list:
+                        config: str | dict) -> list[UPSScraper]:
         """Creates multiple UPSScraper.
 
         :param config: str | dict
@@ -357,24 +464,32 @@ class UPSMultiExporter(UPSExporter):
             for key, value in devices.items()
         ]
 
-    def scrape_data(self):
+    def scrape_data(self) -> Generator[dict[str, Any] | None, None, None]:
         """Scrape measure data.
 
         :return: measures
         """
-        if self.threading:
-            with ThreadPoolExecutor() as executor:
-                futures = [
-                    executor.submit(ups.get_data)
-                    for ups in self.ups_devices
-                ]
+        pool = self._pool
+        if pool is not None:
+            futures = {
+                pool.submit(self.get_ups_data, ups): ups.name
+                for ups in self.ups_devices
+            }
+            # a slow UPS must not discard the results of the others
+            done, not_done = wait(futures, timeout=self.login_timeout+1)
+            for future in done:
                 try:
-                    for future in as_completed(futures, self.login_timeout+1):
-                        yield future.result()
-                except TimeoutError as err:
+                    yield future.result()
+                except Exception as err:
                     self.logger.exception(err)
                     yield None
+            for future in not_done:
+                self.logger.error(
+                    "Scraping %s timed out after %s seconds",
+                    futures[future], self.login_timeout+1
+                )
+                future.cancel()
 
         else:
             for ups in self.ups_devices:
-                yield ups.get_data()
+                yield self.get_ups_data(ups)
@@ -1,7 +1,12 @@
 """REST API web scraper for Eaton UPS measure data."""
-import json
-
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+# also raised by orjson, its JSONDecodeError is a subclass
+from json import JSONDecodeError
+from threading import Lock
+from time import monotonic
 from requests import Session, Response
+from requests.adapters import HTTPAdapter
 from requests.exceptions import (
         ConnectionError,
         InvalidURL,
@@ -11,26 +16,37 @@ from requests.exceptions import (
         )
 # pyre-ignore[21]: pyre thinks urllib3 is not part of requests
 from requests.packages import urllib3
-from prometheus_eaton_ups_exporter import create_logger
+from prometheus_eaton_ups_exporter import create_logger, dumps, loads
 from prometheus_eaton_ups_exporter.scraper_globals import (
         AUTHENTICATION_FAILED,
         CERTIFICATE_VERIFY_FAILED,
         CONNECTION_ERROR,
         INPUT_MEMBER_ID,
         INVALID_URL_ERROR,
+        LOAD_ATTEMPTS,
         LOGIN_DATA,
         LoginFailedException,
         MISSING_SCHEMA_ERROR,
         OUTPUT_MEMBER_ID,
+        PARALLEL_REQUESTS,
         REQUEST_TIMEOUT,
         REST_AUTH_PATH,
         REST_MANAGER_PATH,
         REST_POWER_PATH,
         REST_TEMPERATURES_PATH,
+        RETRY_STATUS_CODES,
         SSL_ERROR,
         TIMEOUT_ERROR,
+        TOKEN_EXPIRY_MARGIN,
         )
-from typing import Tuple
+from typing import List, Tuple
+
+
+@cache
+def disable_insecure_warnings() -> None:
+    """Disable the warnings of insecure requests, once for all scrapers."""
+    # pyre-ignore[16]: pyre thinks urllib3 is not part of requests
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
 class UPSScraper:
@@ -50,6 +66,9 @@ class UPSScraper:
         Allow logging output for development
     :param login_timeout: float
         Login timeout for authentication
+    :param parallel_requests: int
+        Maximum number of requests sent to the UPS at the same time,
+        1 sends them one after another
     """
     def __init__(self,
                  ups_address: str,
@@ -57,22 +76,90 @@ class UPSScraper:
                  name: str | None = None,
                  insecure: bool = False,
                  verbose: bool = False,
-                 login_timeout: int = 3) -> None:
+                 login_timeout: int = 3,
+                 parallel_requests: int = PARALLEL_REQUESTS) -> None:
         self.ups_address = ups_address
         self.username, self.password = authentication
+        # JSON encoded once, login must not modify the shared LOGIN_DATA
+        self._login_body = dumps({
+            **LOGIN_DATA,
+            "username": self.username,
+            "password": self.password
+        })
         self.name = name
         self.login_timeout = login_timeout
         self.session = Session()
+        # a scraper talks to a single UPS, keep its connections alive
+        # across scrapes, one for each request that may run in parallel.
+        # Only GETs answered with a busy status are retried, once, without
+        # backoff and ignoring Retry-After, so a request stays within twice
+        # REQUEST_TIMEOUT. Read timeouts are raised as is (read=False) and
+        # connection errors are left to load_page.
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=parallel_requests,
+            # pyre-ignore[16]: pyre thinks urllib3 is not part of requests
+            max_retries=urllib3.util.Retry(
+                total=1,
+                connect=0,
+                read=False,
+                other=0,
+                status=1,
+                allowed_methods=frozenset({"GET"}),
+                status_forcelist=RETRY_STATUS_CODES,
+                respect_retry_after_header=False,
+                raise_on_status=False
+            )
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.logger = create_logger(__name__, not verbose)
 
         # ignore self signed certificate
         self.session.verify = not insecure
         # disable warnings created because of ignoring certificates
         if not self.session.verify:
-            # pyre-ignore[16]: pyre thinks urllib3 is not part of requests
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            disable_insecure_warnings()
+
+        # urls of the fixed REST API pages
+        self._auth_url = ups_address + REST_AUTH_PATH
+        self._manager_url = ups_address + REST_MANAGER_PATH
+        self._power_url = ups_address + REST_POWER_PATH
+        self._temperatures_url = ups_address + REST_TEMPERATURES_PATH
+        # urls of the pages looked up through the REST API, they stay the
+        # same until the UPS changes its layout
+        self._endpoints = dict()
 
         self.token_type, self.access_token = None, None
+        # monotonic time at which the access token gets renewed
+        self.token_expiry = float('inf')
+        # serializes logins of requests running in parallel
+        self._login_lock = Lock()
+        # runs independent requests of a scrape in parallel
+        self._pool = ThreadPoolExecutor(
+            max_workers=parallel_requests,
+            thread_name_prefix=f"ups-{name}"
+        ) if parallel_requests > 1 else None
+
+    def __del__(self) -> None:
+        pool = getattr(self, "_pool", None)
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def relogin(self, access_token: str | None) -> None:
+        """
+        Login again, unless another request already did.
+
+        :param access_token: the token the request was sent or due with
+        """
+        with self._login_lock:
+            if self.access_token == access_token:
+                token_type, access_token = self.login()
+                # update the header first, a request reading the new token
+                # is then never sent with the old one
+                self.session.headers["Authorization"] = \
+                    f"{token_type} {access_token}"
+                self.token_type, self.access_token = token_type, access_token
 
     def login(self) -> Tuple[str, str]:
         """
@@ -85,19 +172,21 @@ class UPSScraper:
         :return: two for the authentication necessary string values
         """
         try:
-            data = LOGIN_DATA
-            data["username"] = self.username
-            data["password"] = self.password
-
             login_request = self.session.post(
-                self.ups_address + REST_AUTH_PATH,
-                data=json.dumps(data),  # needs to be JSON encoded
+                self._auth_url,
+                data=self._login_body,
                 timeout=self.login_timeout
             )
-            login_response = login_request.json()
+            login_response = loads(login_request.content)
 
             token_type = login_response['token_type']
             access_token = login_response['access_token']
+            if 'expires_in' in login_response:
+                self.token_expiry = monotonic() + \
+                    login_response['expires_in'] - TOKEN_EXPIRY_MARGIN
+            else:
+                # only renew the token once it is rejected
+                self.token_expiry = float('inf')
 
             self.logger.debug(
                 "Authentication successful on (%s) with %s %s",
@@ -150,39 +239,53 @@ class UPSScraper:
 
         This will try to load the page by the given URL.
         If authentication is needed first, the login function gets executed
-        before loading the specified page.
+        before loading the specified page again, up to LOAD_ATTEMPTS times.
 
         :param url: ups web url
         :return: request.Response
         """
-        headers = {
-            "Connection": "keep-alive",
-            "Authorization": f"{self.token_type} {self.access_token}",
-        }
-
-        try:
-            request = self.session.get(
-                url,
-                headers=headers,
-                timeout=REQUEST_TIMEOUT
-            )
+        failure = (AUTHENTICATION_FAILED, "Authentication failed")
+        for _ in range(LOAD_ATTEMPTS):
+            access_token = self.access_token
+            # renew a token about to expire instead of waiting for a rejection
+            if access_token is not None and monotonic() >= self.token_expiry:
+                self.logger.debug('Token expires, login again')
+                self.relogin(access_token)
+                access_token = self.access_token
 
-            # Session might be expired, connect again
             try:
-                print(str(request))
-                if "errorCode" in request.json():
-                    self.logger.debug('Session expired, reconnect')
-                    self.token_type, self.access_token = self.login()
-                    return self.load_page(url)
-            except ValueError:
-                pass
-
-            # try to login, if not authorized
-            if "Unauthorized" in request.text or request.status_code == 401:
+                # the authorization header is kept on the session by relogin
+                request = self.session.get(url, timeout=REQUEST_TIMEOUT)
+            except ConnectionError:
+                self.logger.debug('Connection Error try to login again')
+                failure = (
+                    CONNECTION_ERROR,
+                    "Connection refused, host might be out of reach."
+                )
+                self.relogin(access_token)
+                continue
+            failure = (AUTHENTICATION_FAILED, "Authentication failed")
+
+            # Session might be expired, connect again. Only bodies that
+            # contain the key are parsed, the caller parses the others.
+            content = request.content
+            expired = False
+            if b'"errorCode"' in content:
+                try:
+                    expired = "errorCode" in loads(content)
+                except ValueError:
+                    pass
+            if expired:
+                self.logger.debug('Session expired, reconnect')
+                self.relogin(access_token)
+                continue
+
+            # try to login, if not authorized, checking the raw body so it
+            # is not decoded to text
+            if request.status_code == 401 or b"Unauthorized" in content:
                 self.logger.debug('Unauthorized, try to login')
                 try:
-                    self.token_type, self.access_token = self.login()
-                    return self.load_page(url)
+                    self.relogin(access_token)
                 except LoginFailedException as err:
                     if err.error_code == TIMEOUT_ERROR:
                         raise LoginFailedException(
@@ -191,26 +294,61 @@ class UPSScraper:
                         ) from err
                     # else
                     raise err
+                continue
 
             self.logger.debug('GET %s', url)
             return request
-        except ConnectionError:
-            self.logger.debug('Connection Error try to login again')
-            try:
-                self.token_type, self.access_token = self.login()
-                return self.load_page(url)
-            except LoginFailedException:
-                raise
-        except LoginFailedException:
-            raise
+
+        # still rejected after logging in again
+        raise LoginFailedException(*failure)
+
+    def load_pages(self, *urls: str) -> List[Response]:
+        """
+        Load multiple pages of the UPS Web UI or API in parallel.
+
+        :param urls: ups web urls
+        :return: list of request.Response, in the order of the urls
+        """
+        if self._pool is None or len(urls) == 1:
+            return [self.load_page(url) for url in urls]
+        futures = [self._pool.submit(self.load_page, url) for url in urls]
+        return [future.result() for future in futures]
+
+    def load_endpoints(self, *names: str) -> List[Response] | None:
+        """
+        Load pages of the UPS API at previously looked up urls.
+
+        :param names: names of the endpoints
+        :return: list of request.Response, in the order of the names,
+            None when an endpoint must be looked up (again)
+        """
+        urls = [self._endpoints.get(name) for name in names]
+        if None in urls:
+            return None
+        responses = self.load_pages(*urls)
+        if all(response.ok for response in responses):
+            return responses
+        self.logger.debug('Endpoints %s moved, look them up again', names)
+        for name in names:
+            self._endpoints.pop(name, None)
+        return None
+
+    def load_endpoint(self, name: str) -> Response | None:
+        """
+        Load a page of the UPS API at a previously looked up url.
+
+        :param name: name of the endpoint
+        :return: request.Response, None when the endpoint must be
+            looked up (again)
+        """
+        responses = self.load_endpoints(name)
+        return None if responses is None else responses[0]
 
     def get_system(self) -> dict:
         system = dict()
         try:
-            manager_request = self.load_page(
-                self.ups_address+REST_MANAGER_PATH
-            )
-            manager_overview = manager_request.json()
+            manager_request = self.load_page(self._manager_url)
+            manager_overview = loads(manager_request.content)
 
             system = manager_overview['identification']
 
@@ -218,11 +356,9 @@ class UPSScraper:
             self.logger.error(err)
             print(f"{err.__class__.__name__} - ({self.ups_address}): "
                   f"{err.message}")
-        except json.decoder.JSONDecodeError as err:
+        except JSONDecodeError as err:
             self.logger.debug("Failed to decode system response")
             self.logger.error(err)
-        except Exception:
-            raise
 
         return system
 
@@ -230,26 +366,28 @@ class UPSScraper:
     def get_temperature(self) -> dict:
         temperature = dict()
         try:
-            temperatures_request = self.load_page(
-                self.ups_address+REST_TEMPERATURES_PATH
-            )
-            temperatures_overview = temperatures_request.json()
-
-            temperature_path = temperatures_overview['members'][0]['@id']
-            temperature_request = self.load_page(
-                self.ups_address+temperature_path
-            )
-            temperature = temperature_request.json()
+            temperature_request = self.load_endpoint('temperature')
+            if temperature_request is None:
+                temperatures_request = self.load_page(
+                    self._temperatures_url
+                )
+                temperatures_overview = loads(temperatures_request.content)
+
+                temperature_path = temperatures_overview['members'][0]['@id']
+                self._endpoints['temperature'] = \
+                    self.ups_address + temperature_path
+                temperature_request = self.load_page(
+                    self._endpoints['temperature']
+                )
+            temperature = loads(temperature_request.content)
 
         except LoginFailedException as err:
             self.logger.error(err)
             print(f"{err.__class__.__name__} - ({self.ups_address}): "
                   f"{err.message}")
-        except json.decoder.JSONDecodeError as err:
+        except JSONDecodeError as err:
             self.logger.debug("Failed to decode temperature response")
             self.logger.error(err)
-        except Exception:
-            raise
 
         return temperature
 
@@ -267,37 +405,45 @@ class UPSScraper:
         """
         measurements = dict()
         try:
-            power_dist_request = self.load_page(
-                self.ups_address+REST_POWER_PATH
-            )
-            power_dist_overview = power_dist_request.json()
-
-            if not self.name:
-                self.name = f"ups_{power_dist_overview['id']}"
-
-            ups_inputs_api = power_dist_overview['inputs']['@id']
-            ups_ouptups_api = power_dist_overview['outputs']['@id']
-
-            inputs_request = self.load_page(
-                self.ups_address + ups_inputs_api + f'/{INPUT_MEMBER_ID}'
-            )
-            inputs = inputs_request.json()
-
-            outputs_request = self.load_page(
-                self.ups_address + ups_ouptups_api + f'/{OUTPUT_MEMBER_ID}'
-            )
-            outputs = outputs_request.json()
-
-            ups_backup_sys_api = power_dist_overview['backupSystem']['@id']
-            backup_request = self.load_page(
-                self.ups_address + ups_backup_sys_api
-            )
-            backup = backup_request.json()
-            ups_powerbank_api = backup['powerBank']['@id']
-            powerbank_request = self.load_page(
-                self.ups_address + ups_powerbank_api
+            endpoints = self._endpoints
+            measure_requests = self.load_endpoints(
+                'inputs', 'outputs', 'powerbank'
             )
-            powerbank = powerbank_request.json()
+            if measure_requests is None:
+                power_dist_request = self.load_page(self._power_url)
+                power_dist_overview = loads(power_dist_request.content)
+
+                if not self.name:
+                    self.name = f"ups_{power_dist_overview['id']}"
+
+                ups_inputs_api = power_dist_overview['inputs']['@id']
+                ups_ouptups_api = power_dist_overview['outputs']['@id']
+                ups_backup_sys_api = \
+                    power_dist_overview['backupSystem']['@id']
+                endpoints['inputs'] = \
+                    f'{self.ups_address}{ups_inputs_api}/{INPUT_MEMBER_ID}'
+                endpoints['outputs'] = \
+                    f'{self.ups_address}{ups_ouptups_api}/{OUTPUT_MEMBER_ID}'
+
+                # inputs, outputs and backup system are independent of each
+                # other, the powerbank is looked up through the backup system
+                inputs_request, outputs_request, backup_request = \
+                    self.load_pages(
+                        endpoints['inputs'],
+                        endpoints['outputs'],
+                        self.ups_address + ups_backup_sys_api
+                    )
+                backup = loads(backup_request.content)
+
+                ups_powerbank_api = backup['powerBank']['@id']
+                endpoints['powerbank'] = self.ups_address + ups_powerbank_api
+                powerbank_request = self.load_page(endpoints['powerbank'])
+            else:
+                inputs_request, outputs_request, powerbank_request = \
+                    measure_requests
+            inputs = loads(inputs_request.content)
+            outputs = loads(outputs_request.content)
+            powerbank = loads(powerbank_request.content)
 
             measurements = {
                 "ups_id": self.name,
@@ -310,17 +456,26 @@ class UPSScraper:
             self.logger.error(err)
             print(f"{err.__class__.__name__} - ({self.ups_address}): "
                   f"{err.message}")
-        except json.decoder.JSONDecodeError as err:
+        except JSONDecodeError as err:
             self.logger.debug("Failed to decode measure response")
             self.logger.error(err)
-        except Exception:
-            raise
 
         return measurements
 
     def get_data(self) -> dict:
         data = dict()
-        data['system'] = self.get_system()
-        data['temperature'] = self.get_temperature()
-        data['measures'] = self.get_measures()
+        if self._pool is None:
+            data['system'] = self.get_system()
+            data['temperature'] = self.get_temperature()
+            data['measures'] = self.get_measures()
+            return data
+
+        # system and temperature are loaded in the background while the
+        # measures, which take the most requests, are loaded here
+        system = self._pool.submit(self.get_system)
+        temperature = self._pool.submit(self.get_temperature)
+        measures = self.get_measures()
+        data['system'] = system.result()
+        data['temperature'] = temperature.result()
+        data['measures'] = measures
         return data
\ No newline at end of file
@@ -25,6 +25,18 @@ LOGIN_DATA = {
 # Timeouts in seconds
 REQUEST_TIMEOUT = 2
 
+# Times a page is requested before giving up on logging in again
+LOAD_ATTEMPTS = 3
+
+# Seconds before its expiry an access token is renewed
+TOKEN_EXPIRY_MARGIN = 10
+
+# Maximum number of requests sent to a UPS at the same time
+PARALLEL_REQUESTS = 4
+
+# Responses of a busy UPS web server, a GET is retried once on them
+RETRY_STATUS_CODES = (502, 503, 504)
+
 # Exit Codes
 NORMAL_EXECUTION = 0
 AUTHENTICATION_FAILED = 1
@@ -1,4 +1,5 @@
 import json
+from requests import Response
 
 
 def first_ups_details(conf):
@@ -11,6 +12,12 @@ def first_ups_details(conf):
     return address, auth, ups_name
 
 
+def fake_response(status_code, body):
+    response = Response()
+    response.status_code, response._content = status_code, body
+    return response
+
+
 def scrub_body():
     def before_record_request(request):
         try:
@@ -24,3 +31,47 @@ def scrub_body():
         except AttributeError:
             return request
     return before_record_request
+
+
+def ups_data(ups_id):
+    return {
+        'system': {
+            'name': 'Eaton 5P 1550',
+            'bootloaderVersion': '1.0.0',
+            'firmwareVersion': '2.0.0'
+        },
+        'temperature': {
+            'name': 'UPS temperature',
+            'position': 'inside',
+            'measure': 300.15
+        },
+        'measures': {
+            'ups_id': ups_id,
+            'ups_inputs': {
+                'measures': {'frequency': 50, 'voltage': 230, 'current': 1},
+                'status': {'health': 'ok'},
+                'specifications': {
+                    'voltage': {
+                        'maxReading': 260, 'minReading': 180, 'nominal': 230
+                    }
+                }
+            },
+            'ups_outputs': {
+                'measures': {
+                    'frequency': 50, 'voltage': 230, 'current': 1,
+                    'activePower': 200, 'apparentPower': 230,
+                    'powerFactor': 0.87, 'percentLoad': 15,
+                    'averageEnergy': 180, 'cumulatedEnergy': 1000,
+                    'efficiency': 95
+                },
+                'status': {'health': 'ok'},
+                'specifications': {}
+            },
+            'ups_powerbank': {
+                'measures': {
+                    'voltage': 27, 'stateOfCharge': 100, 'remainingTime': 3600
+                },
+                'status': {'health': 'ok'}
+            }
+        }
+    }
@@ -2,7 +2,9 @@
 Testing the Exporter using the UPSExporter and UPSMultiExporter.
 """
 import pytest
-from . import first_ups_details
+import threading
+import time
+from . import first_ups_details, ups_data
 from prometheus_eaton_ups_exporter.exporter import (
         UPSExporter,
         UPSMultiExporter,
@@ -105,3 +107,216 @@ def test_collect_threading(ups_scraper_conf, threading_multi_exporter) -> None:
         assert gauge.name in names
         assert gauge.samples[0].labels['ups_id'] in \
             list(ups_scraper_conf.keys())
+
+
+def test_cache_ttl(monkeypatch, ups_scraper_conf) -> None:
+    address, auth, ups_name = first_ups_details(ups_scraper_conf)
+    exporter = UPSExporter(address, auth, ups_name, cache_ttl=60)
+    calls = []
+    data = ups_data(ups_name)
+
+    def get_data():
+        calls.append(1)
+        return data
+
+    monkeypatch.setattr(exporter.ups_scraper, "get_data", get_data)
+    first = list(exporter.scrape_data())
+    second = list(exporter.scrape_data())
+    assert first == second
+    assert len(calls) == 1
+
+    exporter.cache_ttl = 0
+    list(exporter.scrape_data())
+    assert len(calls) == 2
+
+
+def test_cache_ttl_skips_incomplete(monkeypatch, ups_scraper_conf) -> None:
+    address, auth, ups_name = first_ups_details(ups_scraper_conf)
+    exporter = UPSExporter(address, auth, ups_name, cache_ttl=60)
+    calls = []
+
+    def get_data():
+        calls.append(1)
+        # the system details failed to load
+        return {**ups_data(ups_name), 'system': {}}
+
+    monkeypatch.setattr(exporter.ups_scraper, "get_data", get_data)
+    list(exporter.scrape_data())
+    list(exporter.scrape_data())
+    assert len(calls) == 2
+
+
+def test_cache_ttl_concurrent_miss(monkeypatch, ups_scraper_conf) -> None:
+    address, auth, ups_name = first_ups_details(ups_scraper_conf)
+    exporter = UPSExporter(address, auth, ups_name, cache_ttl=60)
+    calls = []
+    fetching = threading.Event()
+    release = threading.Event()
+
+    def get_data():
+        calls.append(1)
+        fetching.set()
+        release.wait(5)
+        return ups_data(ups_name)
+
+    monkeypatch.setattr(exporter.ups_scraper, "get_data", get_data)
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                exporter.get_ups_data(exporter.ups_scraper)
+            )
+        )
+        for _ in range(2)
+    ]
+    threads[0].start()
+    fetching.wait(5)
+    threads[1].start()
+    # let the second scrape miss the cache while the first one is fetching
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 2
+    assert results[0] is results[1]
+
+
+def test_compact_metrics(monkeypatch, ups_scraper_conf) -> None:
+    address, auth, ups_name = first_ups_details(ups_scraper_conf)
+    exporter = UPSExporter(address, auth, ups_name, compact_metrics=True)
+    monkeypatch.setattr(
+        exporter.ups_scraper, "get_data", lambda: ups_data(ups_name)
+    )
+    gauges = {gauge.name: gauge for gauge in exporter.collect()}
+
+    assert sorted(gauges) == [
+        'eaton_ups_battery', 'eaton_ups_input', 'eaton_ups_output',
+        'eaton_ups_system', 'eaton_ups_temperature'
+    ]
+    battery = {
+        sample.labels['field']: sample.value
+        for sample in gauges['eaton_ups_battery'].samples
+    }
+    assert battery == {
+        'volts': 27, 'state_of_charge': 100,
+        'remaining_seconds': 3600, 'health': 1
+    }
+    load_ratio = [
+        sample.value for sample in gauges['eaton_ups_output'].samples
+        if sample.labels['field'] == 'load_ratio'
+    ]
+    assert load_ratio == [0.15]
+
+
+def test_compact_metrics_multi(monkeypatch, ups_scraper_conf) -> None:
+    exporter = UPSMultiExporter(ups_scraper_conf, compact_metrics=True)
+    for ups in exporter.ups_devices:
+        monkeypatch.setattr(
+            ups, "get_data", lambda name=ups.name: ups_data(name)
+        )
+    gauges = [
+        gauge for gauge in exporter.collect()
+        if gauge.name == 'eaton_ups_battery'
+    ]
+
+    assert len(gauges) == 1
+    assert {
+        sample.labels['ups_id'] for sample in gauges[0].samples
+    } == set(ups_scraper_conf)
+
+
+def test_collect_realtime_measures(monkeypatch, ups_scraper_conf) -> None:
+    address, auth, ups_name = first_ups_details(ups_scraper_conf)
+    exporter = UPSExporter(address, auth, ups_name)
+    data = ups_data(ups_name)
+    for key in ('ups_inputs', 'ups_outputs'):
+        measures = data['measures'][key]
+        measures['measures'] = {'realtime': measures['measures']}
+    monkeypatch.setattr(exporter.ups_scraper, "get_data", lambda: data)
+    gauges = {gauge.name: gauge for gauge in exporter.collect()}
+
+    assert gauges['eaton_ups_input_volts'].samples[0].value == 230
+    assert gauges['eaton_ups_output_watts'].samples[0].value == 200
+
+
+def test_collect_skips_malformed_ups(monkeypatch, ups_scraper_conf) -> None:
+    exporter = UPSMultiExporter(ups_scraper_conf)
+    broken, working = exporter.ups_devices
+    broken_data = ups_data(broken.name)
+    del broken_data['measures']['ups_powerbank']['status']
+    monkeypatch.setattr(broken, "get_data", lambda: broken_data)
+    monkeypatch.setattr(working, "get_data", lambda: ups_data(working.name))
+
+    ups_ids = {
+        sample.labels['ups_id']
+        for gauge in exporter.collect()
+        for sample in gauge.samples
+    }
+    assert ups_ids == {working.name}
+
+
+def test_threading_reuses_pool(monkeypatch, ups_scraper_conf) -> None:
+    exporter = UPSMultiExporter(ups_scraper_conf, threading=True)
+    for ups in exporter.ups_devices:
+        monkeypatch.setattr(
+            ups, "get_data", lambda name=ups.name: ups_data(name)
+        )
+    workers = set()
+    for _ in range(3):
+        data = list(exporter.scrape_data())
+        assert len(data) == len(exporter.ups_devices)
+        workers.update(exporter._pool._threads)
+    exporter.close()
+
+    assert len(workers) <= len(exporter.ups_devices)
+
+
+def test_threading_timeout_keeps_results(monkeypatch,
+                                         ups_scraper_conf) -> None:
+    exporter = UPSMultiExporter(
+        ups_scraper_conf, threading=True, login_timeout=0
+    )
+    slow, fast = exporter.ups_devices
+    release = threading.Event()
+
+    def slow_data():
+        release.wait(5)
+        return ups_data(slow.name)
+
+    monkeypatch.setattr(slow, "get_data", slow_data)
+    monkeypatch.setattr(fast, "get_data", lambda: ups_data(fast.name))
+    data = list(exporter.scrape_data())
+    release.set()
+    exporter.close()
+
+    assert [d['measures']['ups_id'] for d in data] == [fast.name]
+
+
+def test_static_metrics_reused(monkeypatch, ups_scraper_conf) -> None:
+    address, auth, ups_name = first_ups_details(ups_scraper_conf)
+    exporter = UPSExporter(address, auth, ups_name)
+    data = ups_data(ups_name)
+    monkeypatch.setattr(exporter.ups_scraper, "get_data", lambda: data)
+
+    first = {gauge.name: gauge for gauge in exporter.collect()}
+    second = {gauge.name: gauge for gauge in exporter.collect()}
+    assert second['eaton_ups_system'] is first['eaton_ups_system']
+    assert second['eaton_ups_input_volts_nominal'] is \
+        first['eaton_ups_input_volts_nominal']
+    assert second['eaton_ups_input_volts'] is not \
+        first['eaton_ups_input_volts']
+
+    data['system']['firmwareVersion'] = '2.1.0'
+    data['measures']['ups_inputs']['specifications']['voltage'][
+        'nominal'] = 120
+    third = {gauge.name: gauge for gauge in exporter.collect()}
+    assert third['eaton_ups_system'].samples[0].labels[
+        'firmwareVersion'] == '2.1.0'
+    assert third['eaton_ups_input_volts_nominal'].samples[0].value == 120
+
+    data['system']['name'] = 'Eaton 5P 1550R'
+    fourth = {gauge.name: gauge for gauge in exporter.collect()}
+    assert fourth['eaton_ups_system'].samples[0].labels[
+        'name'] == 'Eaton 5P 1550R'
@@ -1,11 +1,20 @@
+import json
 import pytest
-from . import first_ups_details
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests import Response
+from requests.exceptions import ReadTimeout
+from . import fake_response, first_ups_details
+from prometheus_eaton_ups_exporter import scraper as scraper_module
 from prometheus_eaton_ups_exporter.scraper import UPSScraper
 from prometheus_eaton_ups_exporter.scraper_globals import (
         AUTHENTICATION_FAILED,
         CERTIFICATE_VERIFY_FAILED,
         CONNECTION_ERROR,
         INVALID_URL_ERROR,
+        LOAD_ATTEMPTS,
+        LOGIN_DATA,
         LoginFailedException,
         MISSING_SCHEMA_ERROR,
         REST_MANAGER_PATH,
@@ -24,7 +33,9 @@ def ups_scraper(address,
         auth,
         name,
         insecure=insecure,
-        verbose=True
+        verbose=True,
+        # vcr cassettes can not be replayed from multiple threads
+        parallel_requests=1
     )
 
 
@@ -43,6 +54,19 @@ def scraper_fixture(ups_scraper_conf):
 def test_login(scraper_fixture) -> None:
     token_type, access_token = scraper_fixture.login()
     assert token_type == "Bearer"
+    assert scraper_fixture.token_expiry != float('inf')
+
+
+def test_login_data_unchanged(ups_scraper_conf) -> None:
+    address, auth, ups_name = first_ups_details(ups_scraper_conf)
+    login_data = dict(LOGIN_DATA)
+    first = ups_scraper(address, ("a", "b"), ups_name)
+    second = ups_scraper(address, ("c", "d"), ups_name)
+    assert LOGIN_DATA == login_data
+    assert json.loads(first._login_body) == {
+        **LOGIN_DATA, "username": "a", "password": "b"
+    }
+    assert json.loads(second._login_body)["username"] == "c"
 
 
 @pytest.mark.vcr()
@@ -107,6 +131,231 @@ def test_get_measures(scraper_fixture) -> None:
     ]
 
 
+def test_expired_token_renewed(monkeypatch, scraper_fixture) -> None:
+    logins = []
+
+    def login():
+        logins.append(None)
+        return "Bearer", f"token{len(logins)}"
+
+    sent = []
+
+    def get(url, timeout):
+        sent.append(scraper_fixture.session.headers["Authorization"])
+        return fake_response(200, b'{}')
+
+    monkeypatch.setattr(scraper_fixture, "login", login)
+    monkeypatch.setattr(scraper_fixture.session, "get", get)
+    scraper_fixture.token_type, scraper_fixture.access_token = \
+        "Bearer", "token0"
+    scraper_fixture.session.headers["Authorization"] = "Bearer token0"
+
+    url = scraper_fixture.ups_address + REST_POWER_PATH
+    scraper_fixture.load_page(url)
+    assert not logins
+
+    scraper_fixture.token_expiry = 0
+    scraper_fixture.load_page(url)
+    assert len(logins) == 1
+    assert sent == ["Bearer token0", "Bearer token1"]
+
+
+def test_login_without_expiry(monkeypatch, scraper_fixture) -> None:
+    monkeypatch.setattr(
+        scraper_fixture.session, "post",
+        lambda url, data, timeout: fake_response(
+            200, b'{"token_type": "Bearer", "access_token": "token"}'
+        )
+    )
+    scraper_fixture.token_expiry = 0
+    assert scraper_fixture.login() == ("Bearer", "token")
+    assert scraper_fixture.token_expiry == float('inf')
+
+
+def test_load_page_parses_only_errors(monkeypatch, scraper_fixture) -> None:
+    bodies = [b'{"id": 1}', b'{"classCode": 1, "errorCode": 204}']
+    parsed = []
+
+    def get(url, timeout):
+        return fake_response(200, bodies.pop())
+
+    def loads(content):
+        parsed.append(content)
+        return json.loads(content)
+
+    monkeypatch.setattr(scraper_module, "loads", loads)
+    # the body must not be decoded to text either
+    monkeypatch.setattr(
+        Response, "text", property(lambda response: pytest.fail("decoded"))
+    )
+    monkeypatch.setattr(
+        scraper_fixture, "login", lambda: ("Bearer", "token")
+    )
+    monkeypatch.setattr(scraper_fixture.session, "get", get)
+    response = scraper_fixture.load_page(
+        scraper_fixture.ups_address + REST_POWER_PATH
+    )
+    assert response.content == b'{"id": 1}'
+    assert parsed == [b'{"classCode": 1, "errorCode": 204}']
+
+
+def test_load_page_unauthorized_body(monkeypatch, scraper_fixture) -> None:
+    bodies = [b'{"id": 1}', b'Unauthorized']
+    monkeypatch.setattr(
+        scraper_fixture, "login", lambda: ("Bearer", "token")
+    )
+    monkeypatch.setattr(
+        scraper_fixture.session, "get",
+        lambda url, timeout: fake_response(200, bodies.pop())
+    )
+    response = scraper_fixture.load_page(
+        scraper_fixture.ups_address + REST_POWER_PATH
+    )
+    assert response.content == b'{"id": 1}'
+    assert scraper_fixture.access_token == "token"
+
+
+def test_load_page_gives_up(monkeypatch, scraper_fixture) -> None:
+    logins = []
+
+    def login():
+        logins.append(None)
+        return "Bearer", f"token{len(logins)}"
+
+    def get(url, timeout):
+        return fake_response(401, b'Unauthorized')
+
+    monkeypatch.setattr(scraper_fixture, "login", login)
+    monkeypatch.setattr(scraper_fixture.session, "get", get)
+    with pytest.raises(LoginFailedException) as pytest_wrapped_e:
+        scraper_fixture.load_page(
+            scraper_fixture.ups_address + REST_POWER_PATH
+        )
+    assert pytest_wrapped_e.value.error_code == AUTHENTICATION_FAILED
+    assert len(logins) == LOAD_ATTEMPTS
+
+
+class SlowBusyHandler(BaseHTTPRequestHandler):
+    """Answers /slow after the request timeout, /busy once with a 503."""
+    busy_requests = 0
+
+    def do_GET(self):
+        if self.path == '/slow':
+            time.sleep(0.5)
+            status = 200
+        else:
+            SlowBusyHandler.busy_requests += 1
+            status = 503 if SlowBusyHandler.busy_requests == 1 else 200
+        self.send_response(status)
+        self.send_header('Retry-After', '3')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="function")
+def local_ups(monkeypatch):
+    monkeypatch.setattr(scraper_module, "REQUEST_TIMEOUT", 0.2)
+    SlowBusyHandler.busy_requests = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowBusyHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    scraper = ups_scraper(f'http://127.0.0.1:{server.server_port}',
+                          ("a", "b"), "local")
+    logins = []
+    monkeypatch.setattr(
+        scraper, "login", lambda: logins.append(None) or ("Bearer", "token")
+    )
+    yield scraper, logins
+    server.shutdown()
+    server.server_close()
+
+
+def test_read_timeout_not_retried(local_ups) -> None:
+    scraper, logins = local_ups
+    with pytest.raises(ReadTimeout):
+        scraper.load_page(scraper.ups_address + '/slow')
+    assert not logins
+
+
+def test_busy_retried_without_waiting(local_ups) -> None:
+    scraper, logins = local_ups
+    start = time.monotonic()
+    response = scraper.load_page(scraper.ups_address + '/busy')
+    assert response.status_code == 200
+    assert SlowBusyHandler.busy_requests == 2
+    # Retry-After of the UPS is ignored
+    assert time.monotonic() - start < 1
+    assert not logins
+
+
+def test_get_data_parallel(monkeypatch, ups_scraper_conf) -> None:
+    address, auth, ups_name = first_ups_details(ups_scraper_conf)
+    scraper = UPSScraper(address, auth, ups_name, insecure=True)
+    measured = threading.Event()
+
+    def get_measures():
+        measured.set()
+        return {'ups_id': ups_name}
+
+    # only returns while the measures are loaded at the same time
+    monkeypatch.setattr(
+        scraper, "get_system", lambda: {'loaded': measured.wait(5)}
+    )
+    monkeypatch.setattr(
+        scraper, "get_temperature", lambda: {'loaded': measured.wait(5)}
+    )
+    monkeypatch.setattr(scraper, "get_measures", get_measures)
+    assert scraper.get_data() == {
+        'system': {'loaded': True},
+        'temperature': {'loaded': True},
+        'measures': {'ups_id': ups_name}
+    }
+
+
+def test_get_measures_caches_endpoints(monkeypatch, scraper_fixture) -> None:
+    address = scraper_fixture.ups_address
+    pages = {
+        address + REST_POWER_PATH: {
+            'id': 1,
+            'inputs': {'@id': '/inputs'},
+            'outputs': {'@id': '/outputs'},
+            'backupSystem': {'@id': '/backup'}
+        },
+        address + '/inputs/1': {'id': 'inputs'},
+        address + '/outputs/1': {'id': 'outputs'},
+        address + '/backup': {'powerBank': {'@id': '/powerbank'}},
+        address + '/powerbank': {'id': 'powerbank'}
+    }
+    loaded = []
+
+    def load_page(url):
+        loaded.append(url)
+        if url in pages:
+            return fake_response(200, json.dumps(pages[url]).encode())
+        return fake_response(404, b'{}')
+
+    monkeypatch.setattr(scraper_fixture, "load_page", load_page)
+    measures = scraper_fixture.get_measures()
+    assert len(loaded) == 5
+    assert measures == scraper_fixture.get_measures()
+    assert loaded[5:] == [
+        address + '/inputs/1', address + '/outputs/1', address + '/powerbank'
+    ]
+
+    # endpoints moved, they are looked up again
+    pages[address + '/powerbank/1'] = pages.pop(address + '/powerbank')
+    pages[address + '/backup'] = {'powerBank': {'@id': '/powerbank/1'}}
+    loaded.clear()
+    assert measures == scraper_fixture.get_measures()
+    assert len(loaded) == 8
+    assert loaded[-1] == address + '/powerbank/1'
+
+
 def test_missing_schema_exception() -> None:
     scraper = ups_scraper("", ("", ""), "")
     with pytest.raises(LoginFailedException) as pytest_wrapped_e: